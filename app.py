@@ -1,119 +1,395 @@
 # app.py — Gradio Space: simple mic + web answer + voice reply (Stop button)
 
-import os, re, math, urllib.parse, uuid
+import os, re, math, time, urllib.parse, hashlib, functools, itertools, wave, tempfile, threading, sqlite3
 from io import BytesIO
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
 
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
 import trafilatura
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import DuckDuckGoSearchException, RatelimitException, TimeoutException
 import speech_recognition as sr
 from gtts import gTTS
 import gradio as gr
 
 SENTS_OUT = 3
+TEXT_LIMIT = 8000   # chars of page text considered for the summary
+MAX_SENTS = 200     # sentences considered for the summary
+FETCH_WORKERS = 8   # pages fetched concurrently
+REQUEST_TIMEOUT = 10
+FETCH_DEADLINE = 12  # seconds to wait for pages once searches are done; stragglers are dropped
+UA = {"User-Agent": "Mozilla/5.0"}
+MAX_HTML_BYTES = 512_000        # read at most this much of a page
+MAX_CONTENT_LENGTH = 2_000_000  # don't even start on pages announced larger
+ANSWER_TTL = 600        # seconds a web answer is reused for the same question
+ANSWER_CACHE_MAX = 256
+PAGE_TTL = 86400        # seconds extracted page text is reused
+PAGE_CACHE_MAX = 512
+# extracted page text survives app restarts; point it at persistent storage (e.g. /data)
+# to keep it across rebuilds
+PAGE_DB_PATH = os.environ.get("PAGE_DB_PATH", os.path.join(tempfile.gettempdir(), "page_cache.sqlite"))
+SEARCH_TTL = 600        # seconds a DDG result list is reused for the same query
+SEARCH_CACHE_MAX = 256
+TTS_LANG = "en"
+# under the temp dir so Gradio may serve the files; pruned by age and count after each new file
+TTS_CACHE_DIR = os.path.join(tempfile.gettempdir(), "voicebot_tts")
+TTS_CACHE_TTL = 7 * 86400
+TTS_CACHE_MAX = 256     # mp3 files kept; least recently used go first
+DDG_RETRIES = 3
+# None = library default; the others are fallbacks when throttled (8.x ignores backend and
+# always uses bing, so there only the proxy rotation and backoff apply)
+DDG_BACKENDS = (None, "html", "lite")
+# "name." blocks that site under any TLD; a full domain blocks just that domain
 BAD_DOMAINS = ("pinterest.", "quora.", "reddit.", "youtube.", "facebook.", "x.com", "twitter.")
-STOP = set("""a an the of for in on at to is are was were be and or by with from as about into over after
+STOP = frozenset("""a an the of for in on at to is are was were be and or by with from as about into over after
 before between than then this that those these who what where when which why how""".split())
 
+_TRACKING_PARAMS = frozenset({"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                              "fbclid", "gclid"})
+# matched against the host only (incl. subdomains), never the path
+_BAD_HOST_RE = re.compile("|".join(
+    r"(?:^|\.)" + re.escape(b) + ("" if b.endswith(".") else "$") for b in BAD_DOMAINS))
+_Q_PREFIX = re.compile(r"^\s*(who|what|where|when|why|which|tell me about)\s+(is|are|was|were|the)?\s*", re.I)
+_WORD_RE = re.compile(r"[a-zA-Z]+")
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_META_DESC = etree.XPath('//meta[@name="description"]/@content')
+_META_OG = etree.XPath('//meta[@property="og:description"]/@content')
+_CITE_RE = re.compile(r"\[(?:\d+|citation needed)\]")
+
+# article paragraphs on common answer sites; matched on the host or any subdomain
+_HOST_XPATH = {
+    "wikipedia.org": etree.XPath('//div[@id="mw-content-text"]//p'),
+    "britannica.com": etree.XPath('//div[contains(@class, "topic-content")]//p'),
+    "stackoverflow.com": etree.XPath('//div[contains(@class, "s-prose")]//p'),
+}
+
+# one pooled session: repeated hosts reuse TCP/TLS connections. No HTTP cache here --
+# it would read whole bodies before fetch_html's type/size checks; page_db keeps
+# the extracted text instead
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=1)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# optional comma-separated DDG_PROXIES, rotated on every search attempt
+_DDG_PROXIES = itertools.cycle([p.strip() for p in os.environ.get("DDG_PROXIES", "").split(",") if p.strip()])
+
+_ANSWER_CACHE: dict[str, tuple[float, str]] = {}    # question -> (timestamp, answer)
+_SEARCH_CACHE: dict[str, tuple[float, list]] = {}   # query -> (timestamp, DDG results)
+_PAGE_CACHE: dict[str, tuple[float, str]] = {}      # url -> (timestamp, extracted text)
+_CACHE_LOCK = threading.Lock()  # caches are written from the fetch worker threads
+
+# url -> extracted text on disk, shared across restarts; one connection behind a lock.
+# It's only a cache: if PAGE_DB_PATH can't be opened the app runs on the memory cache.
+try:
+    _PAGE_DB = sqlite3.connect(PAGE_DB_PATH, check_same_thread=False)
+    _PAGE_DB.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, text TEXT NOT NULL, fetched REAL NOT NULL)")
+    _PAGE_DB.execute("CREATE INDEX IF NOT EXISTS pages_fetched ON pages (fetched)")
+except sqlite3.Error:
+    _PAGE_DB = None
+_DB_LOCK = threading.Lock()
+
 # ---------- helpers ----------
+def cache_get(cache: dict, key: str, ttl: float):
+    hit = cache.get(key)
+    if hit and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+def cache_put(cache: dict, key: str, value, max_size: int):
+    # insertion-ordered dict: re-insert on update, evict the oldest when full
+    with _CACHE_LOCK:
+        cache.pop(key, None)
+        cache[key] = (time.monotonic(), value)
+        if len(cache) > max_size:
+            cache.pop(next(iter(cache)), None)
+
+def page_db_get(url: str):
+    # a locked/corrupt DB is just a miss
+    if _PAGE_DB is None: return None
+    try:
+        with _DB_LOCK:
+            row = _PAGE_DB.execute("SELECT text FROM pages WHERE url = ? AND fetched >= ?",
+                                   (url, time.time() - PAGE_TTL)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def page_db_put(url: str, text: str):
+    # expired rows go on every write so the file doesn't grow without bound;
+    # a full, read-only or locked DB just skips the write
+    if _PAGE_DB is None: return
+    now = time.time()
+    try:
+        with _DB_LOCK, _PAGE_DB:
+            _PAGE_DB.execute("INSERT OR REPLACE INTO pages (url, text, fetched) VALUES (?, ?, ?)", (url, text, now))
+            _PAGE_DB.execute("DELETE FROM pages WHERE fetched < ?", (now - PAGE_TTL,))
+    except sqlite3.Error:
+        pass
+
+def prune_page_db():
+    if _PAGE_DB is None: return
+    try:
+        with _DB_LOCK, _PAGE_DB:
+            _PAGE_DB.execute("DELETE FROM pages WHERE fetched < ?", (time.time() - PAGE_TTL,))
+    except sqlite3.Error:
+        pass
+
 def clean_question(q: str) -> str:
     q = q.strip()
-    q = re.sub(r"^\s*(who|what|where|when|why|which|tell me about)\s+(is|are|was|were|the)?\s*",
-               "", q, flags=re.I)
+    q = _Q_PREFIX.sub("", q)
     return q.rstrip("?.! ").strip()
 
 def keywords(t: str):
-    return [w for w in re.findall(r"[a-zA-Z]+", t.lower()) if w not in STOP]
+    return [w for w in _WORD_RE.findall(t.lower()) if w not in STOP]
+
+def score_text(text: str, qset) -> float:
+    # whole-word hits (one tokenizing pass), damped by page length
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    hits = sum(counts[w] for w in qset)
+    return hits / math.sqrt(len(text)/1500 + 1)
+
+def fetch_html(url: str) -> tuple[bytes, str | None]:
+    # stream the body and stop at MAX_HTML_BYTES; skip non-HTML and oversized pages.
+    # Also returns the charset from Content-Type, if the header declares one.
+    with _SESSION.get(url, timeout=REQUEST_TIMEOUT, headers=UA, stream=True) as resp:
+        ctype = resp.headers.get("Content-Type", "")
+        if ctype and "html" not in ctype.lower(): return b"", None
+        if int(resp.headers.get("Content-Length") or 0) > MAX_CONTENT_LENGTH: return b"", None
+        # without an explicit charset requests guesses ISO-8859-1; leave that to <meta charset>
+        charset = requests.utils.get_encoding_from_headers(resp.headers) if "charset" in ctype.lower() else None
+        buf = bytearray()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            buf += chunk
+            if len(buf) >= MAX_HTML_BYTES: break
+        return bytes(buf[:MAX_HTML_BYTES]), charset
+
+@functools.lru_cache(maxsize=1024)
+def url_host(url: str) -> str:
+    return urllib.parse.urlsplit(url).hostname or ""
+
+def canonical_url(url: str) -> tuple:
+    # dedupe key: scheme, fragment, trailing slash, param order and tracking params don't matter
+    p = urllib.parse.urlsplit(url)
+    query = sorted((k, v) for k, v in urllib.parse.parse_qsl(p.query, keep_blank_values=True)
+                   if k.lower() not in _TRACKING_PARAMS)
+    return (p.hostname or "", p.path.rstrip("/"), tuple(query))
+
+def join_paras(paras, budget: int = TEXT_LIMIT) -> str:
+    # paragraph text in order until the char budget is met; later <p> are never visited
+    buf, n = [], 0
+    for p in paras:
+        t = " ".join(" ".join(p.itertext()).split())
+        if not t: continue
+        buf.append(t)
+        n += len(t) + 1
+        if n >= budget: break
+    return " ".join(buf)
+
+def host_xpath(url: str):
+    host = url_host(url)
+    for site, xp in _HOST_XPATH.items():
+        if host == site or host.endswith("." + site):
+            return xp
+    return None
 
 def extract_readable(url: str) -> str:
-    # try Trafilatura first
+    # memory, then disk, then the network; failures ("") aren't cached: a host
+    # that was down may answer next time
+    text = cache_get(_PAGE_CACHE, url, PAGE_TTL)
+    if text is not None:
+        return text
+    text = page_db_get(url)
+    if text is None:
+        text = extract_page(url)
+        if not text:
+            return text
+        page_db_put(url, text)
+    cache_put(_PAGE_CACHE, url, text, PAGE_CACHE_MAX)
+    return text
+
+def parse_html(html: bytes, charset: str | None):
+    # lxml only sniffs <meta charset> and otherwise reads bytes as Latin-1,
+    # so a charset sent in the HTTP header has to be handed to the parser
+    if charset:
+        try:
+            return lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=charset))
+        except LookupError:
+            pass  # unknown charset name: let lxml detect it
+    return lxml.html.fromstring(html)
+
+def extract_page(url: str) -> str:
+    # download once; both extractors work off the same HTML
+    try:
+        html, charset = fetch_html(url)
+    except Exception:
+        return ""
+    if not html: return ""
+    doc = None  # lxml tree, parsed at most once and shared by the fast path and the fallback
+    # known sites: one XPath is far cheaper than trafilatura's generic pipeline
+    xp = host_xpath(url)
+    if xp is not None:
+        try:
+            doc = parse_html(html, charset)
+            text = " ".join(_CITE_RE.sub("", join_paras(xp(doc))).split())[:TEXT_LIMIT]
+            if len(text.split()) > 40:
+                return text
+        except Exception:
+            pass
+    # then Trafilatura on the raw bytes (it does its own charset detection);
+    # fast=True skips its backup extractors, the lxml fallback below covers that
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            extracted = trafilatura.extract(
-                downloaded,
-                include_comments=False, include_links=False, favor_recall=False)
-            if extracted and len(extracted.split()) > 40:
-                return extracted
+        extracted = trafilatura.extract(
+            html,
+            include_comments=False, include_links=False, favor_recall=False, fast=True)
+        if extracted and len(extracted.split()) > 40:
+            return extracted[:TEXT_LIMIT]
     except Exception:
         pass
-    # fallback: bs4
+    # fallback: plain lxml (meta description + leading paragraphs)
     try:
-        html = requests.get(url, timeout=10, headers={"User-Agent":"Mozilla/5.0"}).text
-        soup = BeautifulSoup(html, "lxml")
-        for tag in soup(["script","style","noscript"]): tag.extract()
-        meta = soup.find("meta", attrs={"name":"description"}) or soup.find("meta", property="og:description")
-        meta_text = (meta.get("content","") if meta else "")
-        paras = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-        main = " ".join(paras[:6])
+        if doc is None:
+            doc = parse_html(html, charset)
+        etree.strip_elements(doc, "script", "style", "noscript", with_tail=False)
+        meta = _META_DESC(doc) or _META_OG(doc)
+        meta_text = meta[0] if meta else ""
+        main = join_paras(doc.iter("p"), TEXT_LIMIT - len(meta_text))
         return " ".join((meta_text + " " + main).split())
     except Exception:
         return ""
 
-def rank_and_summarize(text: str, qwords, k=SENTS_OUT) -> str:
+def iter_sents(text: str):
+    # lazy version of _SENT_SPLIT.split(text)
+    start = 0
+    for m in _SENT_SPLIT.finditer(text):
+        yield text[start:m.start()]
+        start = m.end()
+    yield text[start:]
+
+def rank_and_summarize(text: str, qset, k=SENTS_OUT) -> str:
     if not text: return ""
-    text = " ".join(text.split())[:8000]
-    sents = re.split(r"(?<=[.!?])\s+", text)
-    scored = []
-    for i, s in enumerate(sents):
-        words = keywords(s)
-        overlap = sum(1 for w in words if w in qwords)
-        if 6 <= len(s.split()) <= 40:
-            scored.append((overlap, i, s))
-    if not scored:
+    text = " ".join(text.split())[:TEXT_LIMIT]
+    sents = list(itertools.islice(iter_sents(text), MAX_SENTS))
+    n = len(sents)
+    n_words = np.fromiter((len(s.split()) for s in sents), dtype=np.int32, count=n)
+    ok = (n_words >= 6) & (n_words <= 40)
+    if not ok.any():
         return " ".join(sents[:k])
-    scored.sort(key=lambda x: (-x[0], x[1]))
-    chosen = sorted(scored[:max(2,k)], key=lambda x: x[1])
-    return " ".join(s for _,_,s in chosen)
+    # only eligible sentences get lowercased/tokenized; qset holds no stopwords
+    overlap = np.fromiter((len(qset.intersection(_WORD_RE.findall(s.lower()))) if keep else 0
+                           for s, keep in zip(sents, ok)), dtype=np.int32, count=n)
+    idx = np.flatnonzero(ok)
+    # most overlap first, earlier sentence on ties; then back to reading order
+    top = idx[np.lexsort((idx, -overlap[idx]))][:max(2,k)]
+    return " ".join(sents[i] for i in np.sort(top))
 
-def web_answer(user_query: str) -> str:
-    if not user_query.strip():
-        return "I didn't catch that. Please try again."
-    q1 = clean_question(user_query)
-    qwords = keywords(q1)
+def ddg_transient(ex: Exception) -> bool:
+    # 8.x re-raises backend errors as DuckDuckGoSearchException(original_error)
+    cause = ex.args[0] if ex.args and isinstance(ex.args[0], Exception) else ex
+    return isinstance(ex, (RatelimitException, TimeoutException)) or \
+        isinstance(cause, (RatelimitException, TimeoutException))
 
-    results = []
-    with DDGS() as ddg:
-        results.extend(ddg.text(q1, max_results=8, safesearch="moderate", region="in-en"))
+def ddg_text(query: str) -> list:
+    key = " ".join(query.lower().split())
+    cached = cache_get(_SEARCH_CACHE, key, SEARCH_TTL)
+    if cached is not None:
+        return cached
+    # DDG rate-limits an IP after a handful of calls: back off, switch backend/proxy, retry.
+    # DDG errors (throttled or not) end in []; anything else is left to web_answer.
+    for attempt in range(DDG_RETRIES):
+        backend = DDG_BACKENDS[attempt % len(DDG_BACKENDS)]
+        kw = {"backend": backend} if backend else {}
         try:
-            suggs = list(ddg.suggestions(q1))
-            if suggs:
-                phrase = suggs[0].get("phrase","")
-                if phrase and phrase.lower() != q1.lower():
-                    results.extend(ddg.text(phrase, max_results=8, safesearch="moderate", region="in-en"))
-        except Exception:
-            pass
+            with DDGS(proxy=next(_DDG_PROXIES, None)) as ddg:
+                results = ddg.text(query, max_results=8, safesearch="moderate", region="in-en", **kw) or []
+        except DuckDuckGoSearchException as ex:
+            if not ddg_transient(ex):
+                return []
+            if attempt < DDG_RETRIES - 1:
+                time.sleep(2 ** attempt)
+            continue
+        if results:  # empty lists aren't cached; they're usually a throttled backend
+            cache_put(_SEARCH_CACHE, key, results, SEARCH_CACHE_MAX)
+        return results
+    return []
 
-    seen, candidates = set(), []
+def queue_fetches(ex, results, seen: set, futures: dict):
+    # filter/dedupe search hits and start extracting the new ones
     for r in results:
         url = r.get("href") or r.get("url") or ""
         title = r.get("title") or ""
-        if not url or url in seen: continue
-        if any(bad in url for bad in BAD_DOMAINS): continue
-        seen.add(url)
+        if not url: continue
+        key = canonical_url(url)
+        if key in seen or _BAD_HOST_RE.search(url_host(url)): continue
+        seen.add(key)
+        futures[ex.submit(extract_readable, url)] = (len(futures), title, url)
 
-        text = extract_readable(url)
-        if not text: continue
+def web_answer(user_query: str) -> str:
+    if not user_query.strip():
+        return "I didn't catch that. Please try again."
+    q1 = clean_question(user_query)
+    key = q1.lower()
+    cached = cache_get(_ANSWER_CACHE, key, ANSWER_TTL)
+    if cached is not None:
+        return cached
+    qset = set(keywords(q1))
+
+    seen, futures, candidates = set(), {}, []
+    ex = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    try:
+        try:
+            results = ddg_text(q1)
+        except Exception:
+            results = []  # network/library failure: fall through to the "couldn't find" reply
+        queue_fetches(ex, results, seen, futures)
 
-        t = (title + " " + text).lower()
-        hits = sum(t.count(w) for w in set(qwords))
-        score = hits / math.sqrt(len(t)/1500 + 1)
-        candidates.append((score, title, url, text))
+        try:
+            for fut in as_completed(futures, timeout=FETCH_DEADLINE):
+                i, title, url = futures[fut]
+                text = fut.result()
+                if not text: continue
+                score = score_text(title + " " + text, qset)
+                candidates.append((score, i, title, url, text))
+        except FuturesTimeout:
+            pass  # answer from the pages that arrived in time
+    finally:
+        # don't block on slow hosts; late pages still land in extract_readable's cache
+        ex.shutdown(wait=False, cancel_futures=True)
 
     if not candidates:
         return "Sorry, I couldn't find a good answer on the web."
 
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    _, title, url, text = candidates[0]
-    ans = rank_and_summarize(text, qwords, k=SENTS_OUT)
-    host = urllib.parse.urlparse(url).netloc
-    return f"{ans} (Source: {host})"
+    # completion order is arbitrary; break score ties by search rank
+    candidates.sort(key=lambda x: (-x[0], x[1]))
+    _, _, title, url, text = candidates[0]
+    ans = rank_and_summarize(text, qset, k=SENTS_OUT)
+    answer = f"{ans} (Source: {url_host(url)})"
+
+    # only real answers are cached; failures may be transient
+    cache_put(_ANSWER_CACHE, key, answer, ANSWER_CACHE_MAX)
+    return answer
+
+def read_pcm_wav(path: str) -> sr.AudioData | None:
+    # mono 16-bit WAV (what the mic records) is already what recognize_google wants
+    try:
+        with wave.open(path, "rb") as w:
+            if w.getnchannels() == 1 and w.getsampwidth() == 2:
+                return sr.AudioData(w.readframes(w.getnframes()), w.getframerate(), 2)
+    except (wave.Error, EOFError, OSError):
+        pass
+    return None
 
 def transcribe(audio_path: str) -> str:
     r = sr.Recognizer()
-    with sr.AudioFile(audio_path) as src:
-        data = r.record(src)
+    data = read_pcm_wav(audio_path)
+    if data is None:  # other formats: let AudioFile sniff/convert
+        with sr.AudioFile(audio_path) as src:
+            data = r.record(src)
     try:
         return r.recognize_google(data)
     except sr.UnknownValueError:
@@ -121,16 +397,57 @@ def transcribe(audio_path: str) -> str:
     except sr.RequestError:
         return ""
 
+def prune_tts_cache(drop_partial: bool = False):
+    # drop spoken answers unused for TTS_CACHE_TTL, then the least recently used beyond
+    # TTS_CACHE_MAX; .part files are only touched at startup, when no write can be in flight
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    cutoff = time.time() - TTS_CACHE_TTL
+    kept = []
+    for entry in os.scandir(TTS_CACHE_DIR):
+        try:
+            if entry.name.endswith(".part"):
+                if drop_partial:
+                    os.remove(entry.path)
+                continue
+            mtime = entry.stat().st_mtime
+            if mtime < cutoff:
+                os.remove(entry.path)
+            else:
+                kept.append((mtime, entry.path))
+        except OSError:
+            pass
+    if len(kept) > TTS_CACHE_MAX:
+        kept.sort()
+        for _, path in kept[:len(kept) - TTS_CACHE_MAX]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
 def tts_mp3(text: str) -> str | None:
+    # file name is derived from voice + text, so identical answers reuse the earlier mp3
+    key = hashlib.blake2b(f"{TTS_LANG}|{text}".encode("utf-8"), digest_size=12).hexdigest()
+    mp3_path = os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+    if os.path.exists(mp3_path):
+        try:
+            os.utime(mp3_path)  # keep answers in use from being pruned
+        except OSError:
+            pass
+        return mp3_path
     try:
-        mp3_path = f"/tmp/tts_{uuid.uuid4().hex}.mp3"
-        gTTS(text).save(mp3_path)
+        buf = BytesIO()
+        gTTS(text, lang=TTS_LANG).write_to_fp(buf)
+        with open(mp3_path + ".part", "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(mp3_path + ".part", mp3_path)  # never expose a half-written file
+        prune_tts_cache()
         return mp3_path
     except Exception:
         return None
 
 # ---------- Gradio pipeline ----------
 def ask(mic_audio, typed_text, history):
+    # generator: Gradio renders each stage as soon as it is ready
     # decide question
     q = ""
     if mic_audio:
@@ -138,16 +455,23 @@ def ask(mic_audio, typed_text, history):
     if not q and typed_text:
         q = typed_text.strip()
     if not q:
-        return history, None, typed_text
+        yield history, None, typed_text
+        return
+
+    history = (history or []) + [(q, None)]
+    yield history, None, ""  # show the question, clear textbox
 
     ans = web_answer(q)
-    history = (history or []) + [(q, ans)]
+    history = history[:-1] + [(q, ans)]
+    yield history, None, ""
 
     # voice reply
-    mp3 = tts_mp3(ans)
-    return history, mp3, ""  # clear textbox
+    yield history, tts_mp3(ans), ""
 
 # ---------- UI ----------
+prune_tts_cache(drop_partial=True)
+prune_page_db()
+
 with gr.Blocks(theme=gr.themes.Soft(), css="""
 #title {text-align:center}
 """) as demo: